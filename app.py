@@ -1,9 +1,10 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+import numpy as np
 import gspread
-from google.oauth2.service_account import Credentials
+import types
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 # --- 0. AUTHENTICATION SYSTEM ---
 def check_password():
@@ -36,7 +37,7 @@ def check_password():
     return True
 
 if check_password():
-    AAE_STRUCTURE = {
+    AAE_STRUCTURE = types.MappingProxyType({
         "Electric Power Source(Generator)": ["Electric Utility(transformer)", "Generator", "Solar Power System"],
         "Electric Power Distribution": ["Main power Distribution Box", "Toll power distribution box", "Road light distribution box", "Power Cable 3*2.5mm", "Power Cable 4*16mm", "Power Cable 3*10mm", "Power Cable 2*1.5mm"],
         "UPS System": ["UPS Unit", "UPS Battery Bank", "Inverter"],
@@ -56,7 +57,8 @@ if check_password():
         "Weather System (WS)": ["WS"],
         "Variable Message Sign System (VIM)": ["VIM"],
         "ITS/CCTV System": ["PTZ Camera", "Pole 10m", "Pole 15m"]
-    }
+    })
+    AAE_CATEGORIES = tuple(AAE_STRUCTURE)
 
     RCA_STANDARDS = {
         "Electric Power Source(Generator)": ["Fuel Contamination", "AVR Failure", "Battery Dead", "Utility Outage", "Aging"],
@@ -87,42 +89,170 @@ if check_password():
 
     LOCATIONS = ["KM2", "KM16", "KM33", "KM52", "KM60A", "KM60B", "KM64", "KM78", "Along roadside", "others"]
 
+    SCOPE = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
+    MAINT_HEADERS = ("Date", "Category", "Subsystem", "Asset Code", "Failure Cause", "Technician", "Location")
+    PREV_HEADERS = ("Date", "Category", "Subsystem", "Asset Code", "Task Performed", "Status", "Location")
+
+    # Authorized client + spreadsheet handle are built once per process, not on every rerun
+    @st.cache_resource(show_spinner=False)
+    def get_spreadsheet():
+        from google.oauth2.service_account import Credentials
+        creds = Credentials.from_service_account_info(st.secrets["gcp_service_account"], scopes=SCOPE)
+        client = gspread.authorize(creds)
+        # Bound every Sheets call so a hung request fails instead of blocking a worker forever
+        client.set_timeout(30)
+        return client.open_by_url(st.secrets["SHEET_URL"])
+
+    @st.cache_resource(show_spinner=False)
+    def get_ws(name, headers=None):
+        sh = get_spreadsheet()
+        try: return sh.worksheet(name)
+        except gspread.WorksheetNotFound:
+            if headers is None: raise
+            ws = sh.add_worksheet(title=name, rows="1000", cols=str(len(headers)))
+            ws.append_row(list(headers))
+            return ws
+
     def init_connection():
-        scope = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
         try:
-            creds_dict = st.secrets["gcp_service_account"]
-            creds = Credentials.from_service_account_info(creds_dict, scopes=scope)
-            client = gspread.authorize(creds)
-            sh = client.open_by_url(st.secrets["SHEET_URL"])
-            inv = sh.worksheet("Sheet1")
-            
-            try: maint = sh.worksheet("Maintenance_Log")
-            except:
-                maint = sh.add_worksheet(title="Maintenance_Log", rows="1000", cols="7")
-                maint.append_row(["Date", "Category", "Subsystem", "Asset Code", "Failure Cause", "Technician", "Location"])
-            
-            try: prev = sh.worksheet("Preventive_Log")
-            except:
-                prev = sh.add_worksheet(title="Preventive_Log", rows="1000", cols="7")
-                prev.append_row(["Date", "Category", "Subsystem", "Asset Code", "Task Performed", "Status", "Location"])
-            
-            return inv, maint, prev
+            return get_ws("Sheet1"), get_ws("Maintenance_Log", MAINT_HEADERS), get_ws("Preventive_Log", PREV_HEADERS)
         except Exception as e:
             st.error(f"Connection Error: {e}")
             return None, None, None
 
     inv_ws, maint_ws, prev_ws = init_connection()
 
-    def load_data(worksheet):
-        if not worksheet: return pd.DataFrame()
-        data = worksheet.get_all_values()
-        if len(data) < 2: return pd.DataFrame()
+    # All inventory writes go through the batched endpoint: one request regardless of row count
+    def append_assets(rows):
+        inv_ws.append_rows(rows)
+
+    # Reads are cached per worksheet title; every write path calls load_data.clear() before rerunning.
+    # Returns the frame plus a content fingerprint so consumers never re-hash it themselves.
+    @st.cache_data(ttl=60, show_spinner=False)
+    def load_data(title, _worksheet):
+        data = _worksheet.get_all_values()
+        if len(data) < 2: return pd.DataFrame(), 0
         headers = [str(h).strip() for h in data[0]]
         df = pd.DataFrame(data[1:], columns=headers)
-        for col in df.columns:
-            if any(k in col.lower() for k in ['qty', 'total', 'cost', 'value', 'func', 'life', 'age']):
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-        return df
+        num_cols = [col for col in df.columns if any(k in col.lower() for k in ['qty', 'total', 'cost', 'value', 'func', 'life', 'age'])]
+        if num_cols:
+            df[num_cols] = df[num_cols].apply(pd.to_numeric, errors='coerce').fillna(0)
+            # Unit counts are stored as int32 unless a fractional quantity (e.g. cable metres) is present
+            count_cols = [col for col in num_cols if any(k in col.lower() for k in ['qty', 'func'])]
+            whole = df[count_cols].mod(1).eq(0).all()
+            int_cols = whole.index[whole].tolist()
+            if int_cols:
+                df[int_cols] = df[int_cols].astype('int32')
+        # Low-cardinality labels become categoricals so dashboard groupbys hash integer codes, not strings
+        cat_cols = [col for col in df.columns if col not in num_cols and any(k in col.lower() for k in ['category', 'subsystem', 'unit', 'location', 'status'])]
+        if cat_cols:
+            df[cat_cols] = df[cat_cols].astype('category')
+        return df, int(pd.util.hash_pandas_object(df, index=True).sum())
+
+    def read_sheet(worksheet):
+        if not worksheet: return pd.DataFrame(), 0
+        return load_data(worksheet.title, worksheet)
+
+    def invalidate(worksheet):
+        load_data.clear(worksheet.title, worksheet)
+
+    # Log appends run on a per-session background worker, so a submit reruns straight away and one user's
+    # slow write never holds up another's; a single worker keeps a session's appends in submit order.
+    # watch_writes polls while writes are pending and reruns the app once one finishes, and
+    # collect_writes then reports it and drops that sheet's cache before it is read again
+    def queue_write(worksheet, row, message):
+        if "write_pool" not in st.session_state:
+            st.session_state["write_pool"] = ThreadPoolExecutor(max_workers=1)
+        fut = st.session_state["write_pool"].submit(worksheet.append_row, row)
+        st.session_state.setdefault("pending_writes", []).append((worksheet, row, message, fut))
+
+    def collect_writes():
+        pending = st.session_state.get("pending_writes", [])
+        done = [w[3].done() for w in pending]
+        st.session_state["pending_writes"] = [w for w, d in zip(pending, done) if not d]
+        for (worksheet, row, message, fut), d in zip(pending, done):
+            if not d: continue
+            if fut.exception(): st.error(f"Saving to {worksheet.title} failed ({fut.exception()}). Entry not recorded: {row}")
+            else:
+                invalidate(worksheet)
+                st.toast(message)
+
+    @st.fragment(run_every=2)
+    def watch_writes():
+        pending = st.session_state.get("pending_writes", [])
+        if any(w[3].done() for w in pending): st.rerun(scope="app")
+        st.caption(f"⏳ Saving {len(pending)} log entr{'y' if len(pending) == 1 else 'ies'}...")
+
+    # Everything the dashboard derives from the inventory (KPIs, watchlists, figures) is built once
+    # per inventory fingerprint; reruns with unchanged data only unpickle the result
+    @st.cache_data(show_spinner=False, max_entries=8)
+    def build_inventory_view(stamp, _df_inv):
+        import plotly.express as px
+        import plotly.graph_objects as go
+        df = _df_inv
+        v_col, q_col, f_col, c_col = df.columns[7], df.columns[4], df.columns[5], df.columns[0]
+        s_col, id_col = df.columns[1], df.columns[2]
+        life_col, used_col = df.columns[8], df.columns[9]
+
+        total_val, total_qty = df[[v_col, q_col]].sum().to_numpy()
+
+        # --- CALCULATE PER-CATEGORY HEALTH FIRST ---
+        cat_health = df.groupby(c_col, sort=False, observed=True).agg({q_col: 'sum', f_col: 'sum'}).reset_index()
+        func_qty, total_qty_cat = cat_health[f_col].to_numpy(dtype=float), cat_health[q_col].to_numpy(dtype=float)
+        cat_health['Category %'] = np.divide(func_qty, total_qty_cat, out=np.zeros_like(func_qty), where=total_qty_cat > 0) * 100
+
+        # --- NEW GLOBAL HEALTH INDEX CALCULATION ---
+        # Sum of all category percentages divided by number of categories
+        health_idx = cat_health['Category %'].mean() if cat_health.shape[0] else 0
+
+        life, used = df[life_col].to_numpy(dtype=float), df[used_col].to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            remaining = np.nan_to_num(np.clip((life - used) / life * 100, 0, 100), nan=0).round(1)
+        age_df = df[[id_col, s_col, used_col, v_col]].assign(**{'Remaining %': remaining})
+        # One marker per asset, so draw on WebGL rather than one SVG node per point
+        fig_age = px.scatter(age_df, x=used_col, y='Remaining %', size=v_col, color=s_col, hover_name=id_col,
+                             title="Asset Replacement Matrix", render_mode="webgl")
+        fig_age.add_hline(y=20, line_dash="dot", line_color="red")
+        watch = age_df[[id_col, s_col, 'Remaining %']]
+        critical_df = watch[remaining <= 20].sort_values('Remaining %')
+        warning_df = watch[(remaining > 20) & (remaining <= 40)].sort_values('Remaining %')
+
+        # One go.Bar trace with per-bar colours instead of px.bar's one trace per category
+        ch = cat_health.sort_values('Category %')
+        pct = ch['Category %'].to_numpy()
+        palette = px.colors.qualitative.Plotly
+        fig_health = go.Figure(go.Bar(x=pct, y=ch[c_col].astype(str).to_numpy(), orientation='h', text=pct,
+                                      texttemplate='%{text:.1f}%', textposition='outside',
+                                      marker_color=[palette[i % len(palette)] for i in range(len(pct))]))
+        fig_health.update_layout(showlegend=False, xaxis_title="Health % (Functional / Total Quantity)", yaxis_title=c_col)
+
+        # Aggregate server-side so only one slice per subsystem is shipped to the browser
+        sub_val = df.groupby(s_col, sort=False, observed=True)[v_col].sum().reset_index()
+        fig_value = px.pie(sub_val, values=v_col, names=s_col, hole=0.5)
+
+        return {"total_val": total_val, "total_qty": total_qty, "health_idx": health_idx,
+                "fig_age": fig_age, "critical": critical_df, "warning": warning_df,
+                "fig_health": fig_health, "fig_value": fig_value}
+
+    # RCA / PM breakdowns are aggregated to one row per (category, label) before plotting and cached
+    # per log fingerprint, so the browser only receives the stacked totals
+    @st.cache_data(show_spinner=False, max_entries=8)
+    def build_log_figure(stamp, _df_log, label, title):
+        import plotly.express as px
+        counts = _df_log.groupby(['Category', label], observed=True).size().reset_index(name='Count')
+        if label == 'Failure Cause':
+            # Category totals come from the small aggregate, not a second pass + merge over the log
+            cat_totals = counts.groupby('Category', sort=False, observed=True)['Count'].transform('sum')
+            text = counts[label].astype(str) + " (" + (counts['Count'] / cat_totals * 100).round(1).astype(str) + "%)"
+            fig = px.bar(counts, x='Count', y='Category', color=label, orientation='h', text=text, title=title,
+                         labels={'Count': 'Incidents'})
+            fig.update_layout(barmode='stack', showlegend=False)
+        else:
+            text = counts[label].astype(str) + " (" + counts['Count'].astype(str) + ")"
+            fig = px.bar(counts, x='Count', y='Category', color=label, orientation='h', text=text, title=title)
+            fig.update_layout(barmode='stack', showlegend=False, xaxis_title="Total Activities", yaxis_title="Category")
+        fig.update_traces(textposition='inside')
+        return fig
 
     st.set_page_config(page_title="AA EM Asset Portal", layout="wide",page_icon="🟢")
     
@@ -151,9 +281,11 @@ if check_password():
         </div>
     """, unsafe_allow_html=True)
 
-    df_inv = load_data(inv_ws)
-    df_maint = load_data(maint_ws)
-    df_prev = load_data(prev_ws)
+    # Reads are cached for a minute; edits made directly in the spreadsheet can be pulled in sooner
+    if st.sidebar.button("🔄 Refresh Data"): load_data.clear()
+    collect_writes()
+    if st.session_state["pending_writes"]:
+        with st.sidebar: watch_writes()
 
     if st.sidebar.button("🔓 Logout"):
         st.session_state["password_correct"] = False
@@ -161,56 +293,50 @@ if check_password():
 
     menu = st.sidebar.radio("Navigation", ["📊 Smart Dashboard", "🔎 Asset Registry", "📝 Add New Asset", "🛠️ Failure Logs", "📅 Preventive Maintenance"])
 
+    # Each page only reads the sheets it shows (Add New Asset reads none); the rest stay empty this run.
+    # Only the dashboard needs several sheets; just those reads go to a thread pool, since a single read
+    # (usually a cache hit) is cheaper than starting threads
+    page_sheets = {"📊 Smart Dashboard": (inv_ws, maint_ws, prev_ws), "🔎 Asset Registry": (inv_ws,),
+                   "🛠️ Failure Logs": (maint_ws,), "📅 Preventive Maintenance": (prev_ws,)}.get(menu, ())
+    if len(page_sheets) > 1:
+        with ThreadPoolExecutor(max_workers=len(page_sheets)) as ex:
+            frames = dict(zip(page_sheets, ex.map(read_sheet, page_sheets)))
+    else:
+        frames = {ws: read_sheet(ws) for ws in page_sheets}
+    (df_inv, inv_stamp), (df_maint, maint_stamp), (df_prev, prev_stamp) = (
+        frames.get(ws) or read_sheet(None) for ws in (inv_ws, maint_ws, prev_ws))
+
     if menu == "📊 Smart Dashboard":
         if df_inv.empty:
             st.info("Inventory is empty.")
         else:
-            v_col, q_col, f_col, c_col = df_inv.columns[7], df_inv.columns[4], df_inv.columns[5], df_inv.columns[0]
-            s_col, id_col = df_inv.columns[1], df_inv.columns[2]
-            life_col, used_col = df_inv.columns[8], df_inv.columns[9]
-            
-            total_val = df_inv[v_col].sum()
+            view = build_inventory_view(inv_stamp, df_inv)
+            total_val = view["total_val"]
             if total_val >= 1_000_000: display_val = f"{total_val/1_000_000:.2f}M Br"
             elif total_val >= 1_000: display_val = f"{total_val/1_000:.1f}K Br"
             else: display_val = f"{total_val:,.0f} Br"
 
-            # --- CALCULATE PER-CATEGORY HEALTH FIRST ---
-            cat_health = df_inv.groupby(c_col).agg({q_col: 'sum', f_col: 'sum'}).reset_index()
-            cat_health['Category %'] = (cat_health[f_col] / cat_health[q_col] * 100).fillna(0)
-            
-            # --- NEW GLOBAL HEALTH INDEX CALCULATION ---
-            # Sum of all category percentages divided by number of categories
-            if len(cat_health) > 0:
-                global_health_idx = cat_health['Category %'].mean()
-            else:
-                global_health_idx = 0
-
             k1, k2, k3, k4, k5 = st.columns(5)
             k1.metric("💰 Portfolio Value", display_val, help=f"Exact Value: {total_val:,.2f} Br")
-            k2.metric("📦 Active Assets", int(df_inv[q_col].sum()))
-            k3.metric("🏥 Health Index", f"{global_health_idx:.1f}%") # Updated Metric
-            k4.metric("🛠️ Failures Logged", len(df_maint) if not df_maint.empty else 0)
-            k5.metric("📅 PM Activities", len(df_prev) if not df_prev.empty else 0)
+            k2.metric("📦 Active Assets", int(view["total_qty"]))
+            k3.metric("🏥 Health Index", f"{view['health_idx']:.1f}%") # Updated Metric
+            k4.metric("🛠️ Failures Logged", df_maint.shape[0])
+            k5.metric("📅 PM Activities", df_prev.shape[0])
 
             st.divider()
 
             st.markdown("#### ⏳ Asset Life-Age & Sustainability Analysis")
             col_age1, col_age2 = st.columns([6, 4])
-            df_inv['Remaining %'] = ((df_inv[life_col] - df_inv[used_col]) / df_inv[life_col] * 100).clip(0, 100).fillna(0).round(1)
             with col_age1:
-                fig_age = px.scatter(df_inv, x=used_col, y='Remaining %', size=v_col, color=s_col, hover_name=id_col, title="Asset Replacement Matrix")
-                fig_age.add_hline(y=20, line_dash="dot", line_color="red")
-                st.plotly_chart(fig_age, use_container_width=True)
+                st.plotly_chart(view["fig_age"], use_container_width=True, key="age_scatter")
             with col_age2:
                 st.markdown("##### ⚠️ Replacement Watchlist")
-                critical_df = df_inv[df_inv['Remaining %'] <= 20][[id_col, s_col, 'Remaining %']]
-                warning_df = df_inv[(df_inv['Remaining %'] > 20) & (df_inv['Remaining %'] <= 40)][[id_col, s_col, 'Remaining %']]
                 tab1, tab2 = st.tabs(["🔴 Critical (<20%)", "🟡 Warning (20-40%)"])
                 with tab1:
-                    if not critical_df.empty: st.dataframe(critical_df.sort_values('Remaining %'), hide_index=True, use_container_width=True)
+                    if not view["critical"].empty: st.dataframe(view["critical"], hide_index=True, use_container_width=True)
                     else: st.success("No assets in critical zone.")
                 with tab2:
-                    if not warning_df.empty: st.dataframe(warning_df.sort_values('Remaining %'), hide_index=True, use_container_width=True)
+                    if not view["warning"].empty: st.dataframe(view["warning"], hide_index=True, use_container_width=True)
                     else: st.info("No assets in warning zone.")
 
             st.divider()
@@ -218,15 +344,10 @@ if check_password():
             col_h1, col_h2 = st.columns(2)
             with col_h1:
                 st.markdown("#### ⚡ System Health")
-                # Using the previously calculated cat_health for the chart
-                fig_bar = px.bar(cat_health.sort_values('Category %'), x='Category %', y=c_col, orientation='h', text='Category %', color=c_col)
-                fig_bar.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-                fig_bar.update_layout(showlegend=False, xaxis_title="Health % (Functional / Total Quantity)")
-                st.plotly_chart(fig_bar, use_container_width=True)
+                st.plotly_chart(view["fig_health"], use_container_width=True, key="health_bar")
             with col_h2:
                 st.markdown("#### 💎 Valuation by Subsystem")
-                fig_pie = px.pie(df_inv, values=v_col, names=s_col, hole=0.5)
-                st.plotly_chart(fig_pie, use_container_width=True)
+                st.plotly_chart(view["fig_value"], use_container_width=True, key="value_pie")
 
             st.divider()
 
@@ -234,85 +355,95 @@ if check_password():
             col_r1, col_r2 = st.columns(2)
             with col_r1:
                 if not df_maint.empty:
-                    rca_data = df_maint.groupby(['Category', 'Failure Cause']).size().reset_index(name='Incidents')
-                    cat_totals = df_maint.groupby('Category').size().reset_index(name='Total_Cat')
-                    rca_final = rca_data.merge(cat_totals, on='Category')
-                    rca_final['%'] = (rca_final['Incidents'] / rca_final['Total_Cat'] * 100).round(1)
-                    fig_rca = px.bar(rca_final, x='Incidents', y='Category', color='Failure Cause', orientation='h',
-                                     text=rca_final.apply(lambda x: f"{x['Failure Cause']} ({x['%']}%)", axis=1), title="Incident Root Causes")
-                    fig_rca.update_traces(textposition='inside')
-                    fig_rca.update_layout(barmode='stack', showlegend=False)
-                    st.plotly_chart(fig_rca, use_container_width=True)
+                    st.plotly_chart(build_log_figure(maint_stamp, df_maint, 'Failure Cause', "Incident Root Causes"), use_container_width=True, key="rca_bar")
                 else: st.info("No failure logs.")
 
             with col_r2:
                 if not df_prev.empty:
-                    pm_data = df_prev.groupby(['Category', 'Task Performed']).size().reset_index(name='Count')
-                    pm_cat_totals = df_prev.groupby('Category').size().reset_index(name='Total_PM')
-                    pm_final = pm_data.merge(pm_cat_totals, on='Category')
-                    
-                    fig_pm = px.bar(pm_final, 
-                                   x='Count', 
-                                   y='Category', 
-                                   color='Task Performed', 
-                                   orientation='h',
-                                   text=pm_final.apply(lambda x: f"{x['Task Performed']} ({x['Count']})", axis=1),
-                                   title="PM Frequency by Category & Activity")
-                    
-                    fig_pm.update_traces(textposition='inside')
-                    fig_pm.update_layout(barmode='stack', showlegend=False, xaxis_title="Total Activities", yaxis_title="Category")
-                    st.plotly_chart(fig_pm, use_container_width=True)
+                    st.plotly_chart(build_log_figure(prev_stamp, df_prev, 'Task Performed', "PM Frequency by Category & Activity"), use_container_width=True, key="pm_bar")
                 else: st.info("No PM logs.")
 
     elif menu == "📝 Add New Asset":
         st.subheader("📝 New Equipment Registration")
-        c1, c2 = st.columns(2)
-        sel_cat = c1.selectbox("Major Category", list(AAE_STRUCTURE.keys()))
-        sel_sub = c2.selectbox("Subsystem", AAE_STRUCTURE.get(sel_cat, []))
+        # Category stays outside the form because the subsystem options depend on it;
+        # everything else is only read on submit, so it lives in the form and costs no rerun
+        sel_cat = st.selectbox("Major Category", AAE_CATEGORIES)
         with st.form("reg_form", clear_on_submit=True):
+            sel_sub = st.selectbox("Subsystem", AAE_STRUCTURE.get(sel_cat, []))
             a_code = st.text_input("Asset Code")
             a_qty = st.number_input("Quantity", min_value=1)
             a_cost = st.number_input("Unit Cost (Br)", min_value=0.0)
-            if st.form_submit_button("🚀 Commit to Sheet1"):
-                inv_ws.append_row([sel_cat, sel_sub, a_code, "Nos", a_qty, a_qty, a_cost, a_qty*a_cost, 10, 0, 0])
+            if st.form_submit_button("➕ Add to Batch"):
+                st.session_state.setdefault("pending_assets", []).append([sel_cat, sel_sub, a_code, "Nos", a_qty, a_qty, a_cost, a_qty*a_cost, 10, 0, 0])
+
+        # Queued registrations are written together in a single append_rows call
+        pending = st.session_state.get("pending_assets", [])
+        if pending:
+            st.markdown(f"##### 🕒 Pending Registrations ({len(pending)})")
+            st.dataframe(pd.DataFrame([r[:5] for r in pending], columns=["Category", "Subsystem", "Asset Code", "Unit", "Quantity"]), use_container_width=True, hide_index=True)
+            b1, b2 = st.columns(2)
+            if b1.button(f"🚀 Commit {len(pending)} to Sheet1"):
+                append_assets(pending)
+                st.session_state["pending_assets"] = []
+                invalidate(inv_ws)
                 st.success("Registered!"); st.rerun()
+            if b2.button("🗑️ Discard Batch"):
+                st.session_state["pending_assets"] = []
+                st.rerun()
 
     elif menu == "🛠️ Failure Logs":
         st.subheader("🛠️ Technical Failure Logging")
-        l1, l2 = st.columns(2)
-        m_cat = l1.selectbox("Major Category", list(AAE_STRUCTURE.keys()))
-        m_sub = l2.selectbox("Subsystem", AAE_STRUCTURE.get(m_cat, []))
+        m_cat = st.selectbox("Major Category", AAE_CATEGORIES)
         with st.form("maint_form", clear_on_submit=True):
+            m_sub = st.selectbox("Subsystem", AAE_STRUCTURE.get(m_cat, []))
             m_cause = st.selectbox("Root Cause", RCA_STANDARDS.get(m_cat, ["General Issue"]) + ["Wear & Tear", "Vandalism"])
             m_code = st.text_input("Asset Code")
             m_tech = st.text_input("Technician Name")
             m_loc = st.selectbox("Location", LOCATIONS)
             if st.form_submit_button("⚠️ Log Incident"):
-                maint_ws.append_row([datetime.now().strftime("%Y-%m-%d"), m_cat, m_sub, m_code, m_cause, m_tech, m_loc])
-                st.success("Log recorded!"); st.rerun()
+                queue_write(maint_ws, [datetime.now().strftime("%Y-%m-%d"), m_cat, m_sub, m_code, m_cause, m_tech, m_loc], "Log recorded!")
+                st.rerun()
         st.dataframe(df_maint, use_container_width=True, hide_index=True)
 
     elif menu == "📅 Preventive Maintenance":
         st.subheader("📅 Preventive Activity Logging")
-        p1, p2 = st.columns(2)
-        p_cat = p1.selectbox("Category", list(AAE_STRUCTURE.keys()))
-        p_sub = p2.selectbox("Subsystem", AAE_STRUCTURE.get(p_cat, []))
+        p_cat = st.selectbox("Category", AAE_CATEGORIES)
         with st.form("preventive_form", clear_on_submit=True):
+            p_sub = st.selectbox("Subsystem", AAE_STRUCTURE.get(p_cat, []))
             p_code = st.text_input("Asset Code")
             p_task = st.selectbox("Maintenance Task", PM_TASKS.get(p_cat, PM_TASKS["General"]))
             p_stat = st.selectbox("Condition", ["Excellent", "Good", "Needs Repair"])
             p_loc = st.selectbox("Location", LOCATIONS)
             if st.form_submit_button("✅ Log PM"):
-                prev_ws.append_row([datetime.now().strftime("%Y-%m-%d"), p_cat, p_sub, p_code, p_task, p_stat, p_loc])
-                st.success("PM Logged!"); st.rerun()
+                queue_write(prev_ws, [datetime.now().strftime("%Y-%m-%d"), p_cat, p_sub, p_code, p_task, p_stat, p_loc], "PM Logged!")
+                st.rerun()
         st.dataframe(df_prev, use_container_width=True, hide_index=True)
 
     elif menu == "🔎 Asset Registry":
         st.subheader("🔎 Master Registry")
-        edited_df = st.data_editor(df_inv, use_container_width=True, hide_index=True)
+        # Hold the editor's source frame across reruns; only swap it when the sheet contents or row order change
+        if st.session_state.get("registry_stamp") != inv_stamp:
+            # Plain strings keep the label columns free-text in the editor instead of fixed dropdowns
+            st.session_state["registry_df"] = df_inv.astype({col: str for col in df_inv.select_dtypes('category').columns})
+            st.session_state["registry_stamp"] = inv_stamp
+        edited_df = st.data_editor(st.session_state["registry_df"], use_container_width=True, hide_index=True)
         if st.button("💾 Sync Database"):
-            inv_ws.update([edited_df.columns.values.tolist()] + edited_df.values.tolist())
-            st.success("Database synced!"); st.rerun()
+            # Send only the rows that differ from the loaded snapshot, all in one batched request
+            changed = edited_df.ne(st.session_state["registry_df"]).any(axis=1).to_numpy()
+            last_col = gspread.utils.rowcol_to_a1(1, edited_df.shape[1]).rstrip("0123456789")
+            rows, values = np.flatnonzero(changed), edited_df[changed].values.tolist()
+            # Adjacent edited rows collapse into one A1 range per run
+            starts = np.flatnonzero(np.diff(rows, prepend=-2) != 1)
+            ends = np.append(starts[1:], rows.size)
+            updates = [{"range": f"A{rows[a] + 2}:{last_col}{rows[b - 1] + 2}", "values": values[a:b]}
+                       for a, b in zip(starts, ends)]
+            if not updates:
+                st.info("No changes to sync.")
+            else:
+                inv_ws.batch_update(updates)
+                st.session_state.pop("registry_stamp", None)
+                invalidate(inv_ws)
+                st.success("Database synced!"); st.rerun()
 
 
 